@@ -16,6 +16,8 @@ with open("HISTORY.rst") as history_file:
 
 requirements = ["construct", "cryptography", "pyasn1", "pyasn1_modules"]
 
+extra_requirements = {"fasder": ["pyasn1-fasder"]}
+
 setup_requirements = ["pytest-runner"]
 
 test_requirements = ["pytest"]
@@ -35,6 +37,7 @@ setup(
     ],
     description="Utilities to support code signing Windows executable files",
     install_requires=requirements,
+    extras_require=extra_requirements,
     license="MPL2.0",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
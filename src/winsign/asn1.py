@@ -2,10 +2,11 @@
 import hashlib
 import logging
 from binascii import hexlify
-from datetime import datetime
+from datetime import datetime, timezone
 
-from pyasn1.codec.der.decoder import decode as der_decode
+from pyasn1.codec.der.decoder import decode as pyasn1_der_decode
 from pyasn1.codec.der.encoder import encode as der_encode
+from pyasn1.error import PyAsn1Error
 from pyasn1.type import char, namedtype, namedval, tag, univ, useful
 from pyasn1_modules.rfc2315 import (
     Attribute,
@@ -18,6 +19,11 @@ from pyasn1_modules.rfc2315 import (
     TBSCertificate,
 )
 
+try:
+    from pyasn1_fasder import decode_der as fasder_decode
+except ImportError:
+    fasder_decode = None
+
 log = logging.getLogger(__name__)
 
 id_contentType = univ.ObjectIdentifier("1.2.840.113549.1.9.3")
@@ -50,6 +56,33 @@ algo_sha256 = (
 ASN_DIGEST_ALGO_MAP = {"sha1": algo_sha1, "sha256": algo_sha256}
 
 
+def der_decode(substrate, asn1Spec=None, **kwargs):
+    """Decode a DER encoded ASN.1 object.
+
+    This is a drop-in replacement for pyasn1's DER decoder. If pyasn1-fasder
+    is installed, its much faster native decoder is used. pyasn1-fasder
+    requires a schema, and is strict about trailing data and canonical
+    encodings, so we fall back to pyasn1's decoder when it fails. Data from
+    third parties is often not strictly DER, so prefer pyasn1's decoder
+    directly for that.
+
+    Args:
+        substrate (bytes): DER encoded data
+        asn1Spec (ASN.1 object): schema to decode the data with
+
+    Returns:
+        (decoded object, remaining bytes)
+
+    """
+    if fasder_decode is not None and asn1Spec is not None and not kwargs:
+        try:
+            return fasder_decode(substrate, asn1Spec=asn1Spec)
+        except PyAsn1Error:
+            # pyasn1-fasder's Pyasn1FasderError is a subclass of PyAsn1Error
+            pass
+    return pyasn1_der_decode(substrate, asn1Spec=asn1Spec, **kwargs)
+
+
 class SpcString(univ.Choice):
     """SPC String class represetning unicode or ascii strings."""
 
@@ -231,9 +264,9 @@ def get_signatures_from_certificates(certificates):
     """Retrieve the signatures from a list of certificates."""
     retval = []
     for cert in certificates:
-        ci, _ = der_decode(cert["data"], ContentInfo())
-        signed_data, _ = der_decode(ci["content"], SignedData())
-        spc, _ = der_decode(
+        ci, _ = pyasn1_der_decode(cert["data"], ContentInfo())
+        signed_data, _ = pyasn1_der_decode(ci["content"], SignedData())
+        spc, _ = pyasn1_der_decode(
             signed_data["contentInfo"]["content"], SpcIndirectDataContent()
         )
         signed_data["contentInfo"]["content"] = spc
@@ -401,7 +434,7 @@ async def make_authenticode_signeddata(
 
     """
     if not timestamp:
-        timestamp = useful.UTCTime.fromDateTime(datetime.now())
+        timestamp = useful.UTCTime.fromDateTime(datetime.now(timezone.utc))
 
     asn_digest_algo = ASN_DIGEST_ALGO_MAP[digest_algo]
 
@@ -412,7 +445,12 @@ async def make_authenticode_signeddata(
     pkcs7_cert = x509_to_pkcs7(cert)
 
     signer_info = make_signer_info(
-        pkcs7_cert, digest_algo, timestamp, calc_spc_digest(encoded_spc, digest_algo)
+        pkcs7_cert,
+        digest_algo,
+        timestamp,
+        calc_spc_digest(encoded_spc, digest_algo),
+        opus_info=opus_info,
+        opus_url=opus_url,
     )
 
     signer_digest = calc_signerinfo_digest(signer_info, digest_algo)
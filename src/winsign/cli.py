@@ -2,34 +2,132 @@
 """CLI for signing PE and MSI files."""
 import asyncio
 import logging
+import os
+import shutil
+import stat
 import sys
 import tempfile
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from winsign.crypto import load_pem_certs, load_private_key
-from winsign.sign import key_signer, sign_file
-
 log = logging.getLogger(__name__)
 
+# Block size used when copying whole files around. This module only imports
+# the standard library at the top level, so other modules can share it cheaply.
+COPY_BLOCK_SIZE = 16 * 1024 ** 2
 
-def _copy_stream(instream, outstream):
-    while True:
-        block = instream.read(1024 ** 2)
-        if not block:
+
+def _sendfile(instream, outstream):
+    """Copy the rest of a regular file to outstream using os.sendfile.
+
+    Returns:
+        True if the data was copied
+        False if sendfile can't be used for these streams
+
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        infd = instream.fileno()
+        outfd = outstream.fileno()
+        st = os.fstat(infd)
+    except (AttributeError, OSError):
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        return False
+
+    # Work from the offset the stream thinks it's at, rather than the file
+    # descriptor's, since instream may have buffered data already
+    start = offset = instream.tell()
+    outstream.flush()
+    while offset < st.st_size:
+        try:
+            sent = os.sendfile(outfd, infd, offset, st.st_size - offset)
+        except OSError:
+            if offset == start:
+                # e.g. outstream was opened for appending
+                return False
+            raise
+        if not sent:
             break
-        outstream.write(block)
+        offset += sent
+    instream.seek(offset)
+    return True
+
+
+def _copy_stream(instream, outstream):
+    if not _sendfile(instream, outstream):
+        shutil.copyfileobj(instream, outstream, COPY_BLOCK_SIZE)
+
+
+def _sign_file_worker(infile, outfile, certs, priv_key, digest_algo, loglevel, kwargs):
+    """Sign a single file in a worker process.
+
+    Certificates and keys can't be pickled, so they're passed as paths and
+    loaded in the worker. They're cached, so each worker only loads them once.
+    """
+    from winsign.crypto import load_pem_certs_file, load_private_key_file
+    from winsign.sign import key_signer, sign_file
+
+    logging.basicConfig(format="%(asctime)s - %(message)s", level=loglevel)
+    certs = load_pem_certs_file(certs)
+    signer = key_signer(load_private_key_file(priv_key))
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            sign_file(infile, outfile, digest_algo, certs, signer, **kwargs)
+        )
+    finally:
+        loop.close()
+
+
+async def _sign_files_parallel(files, args, kwargs):
+    """Sign files in parallel, using a pool of worker processes."""
+    loop = asyncio.get_event_loop()
+    with ProcessPoolExecutor(max_workers=min(args.jobs, len(files))) as executor:
+        futures = [
+            loop.run_in_executor(
+                executor,
+                _sign_file_worker,
+                infile,
+                outfile,
+                args.certs,
+                args.priv_key,
+                args.digest_algo,
+                args.loglevel,
+                kwargs,
+            )
+            for infile, outfile in files
+        ]
+        return await asyncio.gather(*futures)
 
 
 def build_parser():
     """Create our CLI ArgumentParser."""
     parser = ArgumentParser()
-    parser.add_argument("infile", help="unsigned file to sign")
     parser.add_argument(
-        "outfile",
-        help="where to write output to. defaults to infile",
+        "files",
+        metavar="file",
+        nargs="+",
+        help="unsigned file to sign, optionally followed by where to write "
+        "output to (defaults to the unsigned file). with --outdir, any number "
+        "of unsigned files can be given",
+    )
+    parser.add_argument(
+        "--outdir",
+        dest="outdir",
+        help="directory to write signed files to, when signing multiple files",
         default=None,
-        nargs="?",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="number of files to sign in parallel when using --outdir. "
+        "defaults to the number of CPUs",
+        default=os.cpu_count() or 1,
     )
     parser.add_argument(
         "--certs",
@@ -50,6 +148,12 @@ def build_parser():
         required=True,
     )
     parser.add_argument("-t", dest="timestamp", choices=["old", "rfc3161"])
+    parser.add_argument(
+        "--use-osslsigncode",
+        dest="use_osslsigncode",
+        action="store_true",
+        help="use osslsigncode to sign PE files instead of the built-in code",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -69,6 +173,11 @@ async def async_main(argv=None):
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    # These pull in cryptography, pyasn1 and construct, which are slow to
+    # import. Importing them here keeps things like --help fast.
+    from winsign.crypto import load_pem_certs_file, load_private_key_file
+    from winsign.sign import key_signer, sign_file, sign_files
+
     logging.basicConfig(format="%(asctime)s - %(message)s", level=args.loglevel)
 
     if not args.priv_key:
@@ -78,16 +187,46 @@ async def async_main(argv=None):
                 "--autograph-secret must be specified"
             )
 
-    if not args.outfile:
-        args.outfile = args.infile
+    if args.outdir:
+        if "-" in args.files:
+            parser.error("can't read from stdin when using --outdir")
+        names = [Path(f).name for f in args.files]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            parser.error(
+                "multiple files would be written to the same path in --outdir: "
+                + ", ".join(duplicates)
+            )
+        try:
+            Path(args.outdir).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            parser.error(f"can't create --outdir {args.outdir}: {e.strerror}")
+    elif len(args.files) > 2:
+        parser.error("--outdir must be specified when signing multiple files")
+    else:
+        args.infile = args.files[0]
+        args.outfile = args.files[1] if len(args.files) > 1 else args.infile
 
-    certs = []
-    certs_data = open(args.certs, "rb").read()
-    certs = load_pem_certs(certs_data)
-    priv_key = load_private_key(open(args.priv_key, "rb").read())
+    certs = load_pem_certs_file(args.certs)
+    priv_key = load_private_key_file(args.priv_key)
 
     signer = key_signer(priv_key)
 
+    if args.outdir:
+        outdir = Path(args.outdir)
+        files = [(Path(f), outdir / Path(f).name) for f in args.files]
+        kwargs = dict(
+            url=args.url,
+            comment=args.comment,
+            timestamp_style=args.timestamp,
+            use_osslsigncode=args.use_osslsigncode,
+        )
+        if args.jobs > 1 and len(files) > 1:
+            results = await _sign_files_parallel(files, args, kwargs)
+        else:
+            results = await sign_files(files, args.digest_algo, certs, signer, **kwargs)
+        return 0 if all(results) else 1
+
     with tempfile.TemporaryDirectory() as d:
         d = Path(d)
         if args.infile == "-":
@@ -111,6 +250,7 @@ async def async_main(argv=None):
             url=args.url,
             comment=args.comment,
             timestamp_style=args.timestamp,
+            use_osslsigncode=args.use_osslsigncode,
         )
 
         # TODO: Extra cross-cert
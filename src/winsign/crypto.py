@@ -1,9 +1,16 @@
 """key and signing functions for winsign."""
+import os
+import re
+from functools import lru_cache
+
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, utils
 
+PEM_CERT_BEGIN = b"-----BEGIN CERTIFICATE-----"
+PEM_CERT_RE = re.compile(PEM_CERT_BEGIN + rb".+?-----END CERTIFICATE-----", re.DOTALL)
+
 
 def sign_signer_digest(priv_key, digest_algo, signer_digest):
     """Sign a digest with a private key.
@@ -39,11 +46,44 @@ def load_pem_cert(pem_data):
 
 
 def load_pem_certs(pem_data):
-    """Load multiple x509 certificates from a PEM encoded string."""
-    certs = []
-    for cert in pem_data.split(b"-----BEGIN CERTIFICATE-----\n"):
-        if not cert:
-            continue
-        cert = b"-----BEGIN CERTIFICATE-----\n" + cert
-        certs.append(load_pem_cert(cert))
+    """Load multiple x509 certificates from a PEM encoded string.
+
+    Raises:
+        ValueError: if a certificate block isn't complete
+
+    """
+    certs = [load_pem_cert(m.group()) for m in PEM_CERT_RE.finditer(pem_data)]
+    if len(certs) != pem_data.count(PEM_CERT_BEGIN):
+        raise ValueError("Incomplete PEM certificate block")
     return certs
+
+
+@lru_cache(maxsize=16)
+def _load_pem_certs_file(path, mtime):
+    with open(path, "rb") as f:
+        return tuple(load_pem_certs(f.read()))
+
+
+def load_pem_certs_file(path):
+    """Load multiple x509 certificates from a PEM encoded file.
+
+    The parsed certificates are cached by the file's path and modification
+    time, so loading the same file repeatedly only parses it once.
+    """
+    path = os.path.abspath(path)
+    return list(_load_pem_certs_file(path, os.stat(path).st_mtime_ns))
+
+
+@lru_cache(maxsize=16)
+def _load_private_key_file(path, mtime):
+    with open(path, "rb") as f:
+        return load_private_key(f.read())
+
+
+def load_private_key_file(path):
+    """Load private key from a PEM encoded file.
+
+    The parsed key is cached by the file's path and modification time.
+    """
+    path = os.path.abspath(path)
+    return _load_private_key_file(path, os.stat(path).st_mtime_ns)
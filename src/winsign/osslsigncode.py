@@ -1,11 +1,16 @@
 """Functions for using osslsigncode utility for signing."""
+import itertools
 import logging
 import os
+import shlex
+import shutil
 import subprocess
 import tempfile
+import threading
+from multiprocessing.util import Finalize
 from pathlib import Path
 
-from winsign.pefile import certificate, is_pefile
+from winsign.pefile import build_certificate, certificate, is_pefile
 
 log = logging.getLogger(__name__)
 
@@ -60,10 +65,129 @@ Iq4ITEtYW5tfl1hf8AyEmz0=
 -----END PRIVATE KEY-----
 """
 
+# Memory backed filesystem used for the small temporary files used to pass
+# signatures to and from osslsigncode
+_SHM_DIR = "/dev/shm"
+
+
+def _tmp_root():
+    """Return the directory to use for small temporary signature files.
+
+    A memory backed filesystem is used if we have a writable one, unless the
+    user picked a temporary directory with TMPDIR. Returns None to use
+    tempfile's default.
+    """
+    if "TMPDIR" not in os.environ and os.access(_SHM_DIR, os.W_OK):
+        return _SHM_DIR
+    return None
+
+
+# Directory holding the dummy cert/key on disk. It's created on first use and
+# reused for the lifetime of the process.
+_DUMMY_DIR = None
+_DUMMY_COUNTER = itertools.count()
+
+
+def _dummy_dir():
+    """Return the directory holding the dummy cert/key, creating it if required."""
+    global _DUMMY_DIR
+    if _DUMMY_DIR is None:
+        d = Path(tempfile.mkdtemp(prefix="winsign-"))
+        # Unlike atexit handlers, this also runs when multiprocessing workers
+        # (e.g. the CLI's process pool) exit
+        Finalize(None, shutil.rmtree, (d,), {"ignore_errors": True}, exitpriority=0)
+        (d / "cert.pem").write_text(DUMMY_KEY)
+        _DUMMY_DIR = d
+    return _DUMMY_DIR
+
+
+_KEEPALIVE_SENTINEL = b"__winsign_osslsigncode_done__"
+
+# Reads one shell quoted osslsigncode command line per line of input, and
+# runs it. The exit status is reported on a line of its own after the
+# command's output.
+_KEEPALIVE_SCRIPT = f"""
+while IFS= read -r job; do
+    eval "osslsigncode $job" </dev/null 2>&1
+    printf '\\n{_KEEPALIVE_SENTINEL.decode()} %d\\n' "$?"
+done
+"""
+
+
+class OsslsigncodeServer:
+    """Long-lived shell process that runs osslsigncode commands for us.
+
+    Each command is still a new osslsigncode process, but they're spawned by
+    a small shell rather than by forking this (much larger) Python process.
+    """
+
+    def __init__(self):
+        """Start the shell process."""
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            ["bash", "-c", _KEEPALIVE_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def run(self, args):
+        """Run osslsigncode with the given arguments.
+
+        Args:
+            args (list): List of command arguments to pass to osslsigncode
+
+        Returns:
+            (returncode, output) tuple of osslsigncode's exit status, and its
+            combined stdout and stderr as bytes
+
+        Raises:
+            OSError: the shell process exited unexpectedly
+
+        """
+        job = " ".join(shlex.quote(str(arg)) for arg in args)
+        with self.lock:
+            try:
+                self.proc.stdin.write(os.fsencode(job) + b"\n")
+                self.proc.stdin.flush()
+            except BrokenPipeError:
+                raise OSError("osslsigncode server exited unexpectedly")
+            output = []
+            for line in self.proc.stdout:
+                if line.startswith(_KEEPALIVE_SENTINEL):
+                    returncode = int(line.split()[1])
+                    break
+                output.append(line)
+            else:
+                raise OSError("osslsigncode server exited unexpectedly")
+        # Drop the newline printed before the sentinel
+        return returncode, b"".join(output)[:-1]
+
+    def close(self):
+        """Stop the shell process."""
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+_KEEPALIVE_SERVER = None
+
+
+def _keepalive_server():
+    """Return this process's `OsslsigncodeServer`, starting it if required."""
+    global _KEEPALIVE_SERVER
+    # Worker processes can't share their parent's server
+    if _KEEPALIVE_SERVER is None or _KEEPALIVE_SERVER.pid != os.getpid():
+        _KEEPALIVE_SERVER = OsslsigncodeServer()
+        Finalize(_KEEPALIVE_SERVER, _KEEPALIVE_SERVER.close, exitpriority=0)
+    return _KEEPALIVE_SERVER
+
 
 def osslsigncode(args, log_errors=True):
     """Run a command using `osslsigncode`.
 
+    If the WINSIGN_KEEPALIVE environment variable is set to 1, commands are
+    run via a long-lived `OsslsigncodeServer`.
+
     Example:
         >>> osslsigncode(["verify", "signed.exe"])
 
@@ -81,14 +205,27 @@ def osslsigncode(args, log_errors=True):
     """
     cmd = ["osslsigncode"] + list(args)
     log.debug("running: %s", cmd)
-    p = subprocess.run(
-        cmd, stderr=subprocess.STDOUT, stdout=subprocess.PIPE, encoding="utf8"
-    )
-    if p.returncode != 0:
+    # The server reads one command per line
+    if os.environ.get("WINSIGN_KEEPALIVE") == "1" and not any(
+        "\n" in str(arg) for arg in args
+    ):
+        returncode, output = _keepalive_server().run(args)
+    else:
+        # The output is only used for logging errors, so don't collect it if
+        # nobody will see it
+        capture = log_errors and log.isEnabledFor(logging.ERROR)
+        p = subprocess.run(
+            cmd,
+            stderr=subprocess.STDOUT if capture else subprocess.DEVNULL,
+            stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        )
+        returncode, output = p.returncode, p.stdout
+    if returncode != 0:
         if log_errors:
             log.error("osslsigncode failed when running %s:", args[0])
-            for line in p.stdout.split("\n"):
-                log.error(line)
+            # output is None if error logging is disabled
+            for line in (output or b"").split(b"\n"):
+                log.error(line.decode("utf8", errors="replace"))
         raise OSError("osslsigncode failed")
 
 
@@ -179,7 +316,7 @@ def is_signed(filename):
         False otherwise
 
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with tempfile.TemporaryDirectory(dir=_tmp_root()) as tmpdir:
         try:
             cmd = [
                 "extract-signature",
@@ -194,7 +331,9 @@ def is_signed(filename):
             return False
 
 
-def get_dummy_signature(infile, digest_algo, url=None, comment=None, crosscert=None):
+def get_dummy_signature(
+    infile, digest_algo, url=None, comment=None, crosscert=None, is_pe=None
+):
     """Sign a file using dummy keys.
 
     This is useful as a way to get the structure of a signature, without having
@@ -208,17 +347,22 @@ def get_dummy_signature(infile, digest_algo, url=None, comment=None, crosscert=N
         url (str): A URL to embed into the signature
         comment (str): A string to embed into the signature
         crosscert (str): Extra certificates to attach to the signature
+        is_pe (bool): Whether infile is a PE file. Determined from the file
+                      if not specified.
 
     Returns:
         bytes of the dummy signature as a DER encoded ASN.1 structure
 
     """
-    with tempfile.TemporaryDirectory() as d:
-        d = Path(d)
-        cert_file = d / "cert.pem"
-        cert_file.write_text(DUMMY_KEY)
-        infile = Path(infile)
-        dest = d / ("signed1" + infile.suffix)
+    d = _dummy_dir()
+    cert_file = d / "cert.pem"
+    infile = Path(infile)
+    # osslsigncode refuses to overwrite existing files, so each call needs
+    # its own unique output paths
+    job_id = f"{os.getpid()}-{next(_DUMMY_COUNTER)}"
+    dest = d / f"signed-{job_id}{infile.suffix}"
+    sig = d / f"signature-{job_id}"
+    try:
         run_sign_command(
             infile,
             dest,
@@ -229,37 +373,45 @@ def get_dummy_signature(infile, digest_algo, url=None, comment=None, crosscert=N
             comment=comment,
             crosscert=crosscert,
         )
-        sig = d / "signature"
         extract_signature(dest, sig)
-        if is_pefile(infile):
-            pefile_cert = certificate.parse(sig.read_bytes())
-            return pefile_cert.data
+        # extract-signature writes the signature as DER; PE files have it
+        # wrapped in a certificate table entry
+        sig_data = sig.read_bytes()
+        if is_pe is None:
+            is_pe = is_pefile(infile)
+        if is_pe:
+            return certificate.parse(sig_data).data
         else:
-            return sig.read_bytes()
+            return sig_data
+    finally:
+        for f in (dest, sig):
+            if f.exists():
+                f.unlink()
 
 
-def write_signature(infile, outfile, sig):
+def write_signature(infile, outfile, sig, is_pe=None):
     """Writes a signature into a file.
 
     Args:
         infile (str): Path to the unsigned file
         outfile (str): Path to write the signature into
         sig (str): bytes of signature to add into the file
+        is_pe (bool): Whether infile is a PE file. Determined from the file
+                      if not specified.
 
     Returns:
         Same as `winsign.sign.osslsigncode`_
 
     """
+    if is_pe is None:
+        is_pe = is_pefile(infile)
     # PE files need their signatures encapsulated
-    if is_pefile(infile):
-        padlen = (8 - len(sig) % 8) % 8
-        sig += b"\x00" * padlen
-        cert = certificate.build(
-            {"size": len(sig) + 8, "revision": "REV2", "certtype": "PKCS7", "data": sig}
-        )
+    if is_pe:
+        sig = sig.ljust((len(sig) + 7) & ~7, b"\x00")
+        cert = build_certificate(sig)
     else:
         cert = sig
-    with tempfile.NamedTemporaryFile() as sigfile:
+    with tempfile.NamedTemporaryFile(dir=_tmp_root()) as sigfile:
         sigfile.write(cert)
         sigfile.flush()
         cmd = [
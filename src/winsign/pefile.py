@@ -10,6 +10,8 @@ This module provides various structures and methods that represent Windows PE fi
 with a specific focus on the parts of the format required for signing.
 """
 import hashlib
+import shutil
+import struct
 
 from construct import (
     Array,
@@ -29,6 +31,7 @@ from construct import (
     this,
 )
 from winsign.asn1 import der_encode, make_authenticode_signeddata
+from winsign.cli import COPY_BLOCK_SIZE
 
 dos_stub = Struct("magic" / Const(b"MZ"), "pe_offset" / Pointer(0x3C, Int16ul))
 
@@ -66,6 +69,33 @@ certificate = Struct(
     "data" / Bytes(this.size - 8),
 )
 
+# Header of a certificate table entry: size, revision, certificate type
+certificate_header = struct.Struct("<IHH")
+WIN_CERT_REVISION_2_0 = 0x0200
+WIN_CERT_TYPE_PKCS_SIGNED_DATA = 0x0002
+
+
+def build_certificate(data):
+    """Build a certificate table entry containing a PKCS7 signature.
+
+    This produces the same bytes as building a REV2, PKCS7 `certificate`, but
+    without the overhead of going through construct.
+
+    Args:
+        data (bytes): DER encoded signature
+
+    Returns:
+        The encoded certificate table entry
+
+    """
+    return (
+        certificate_header.pack(
+            len(data) + 8, WIN_CERT_REVISION_2_0, WIN_CERT_TYPE_PKCS_SIGNED_DATA
+        )
+        + data
+    )
+
+
 section = Struct(
     "name" / PaddedString(8, "utf8"),
     "vsize" / Int32ul,
@@ -235,15 +265,21 @@ def get_certificates(f):
     return pe.certificates
 
 
-def add_signature(infile, outfile, signature):
-    """Add a signature to a PE file."""
+def add_signature(infile, outfile, signature, replace=False):
+    """Add a signature to a PE file.
+
+    Args:
+        infile (file object): PE file opened for reading
+        outfile (file object): file opened for reading and writing where the
+                               signed PE file will be written
+        signature (bytes): DER encoded signature to add
+        replace (bool): whether to replace any existing signatures rather than
+                        adding to them. Defaults to False.
+
+    """
     # First copy infile to outfile
     infile.seek(0)
-    while True:
-        block = infile.read(1024)
-        if not block:
-            break
-        outfile.write(block)
+    shutil.copyfileobj(infile, outfile, COPY_BLOCK_SIZE)
 
     outfile.seek(0)
     pe = pefile.parse_stream(outfile)
@@ -252,17 +288,17 @@ def add_signature(infile, outfile, signature):
             "Can't add a signature into this file (not enough RVA sections)"
         )
 
-    cert = certificate.build(
-        {
-            "size": len(signature) + 8,
-            "revision": "REV2",
-            "certtype": "PKCS7",
-            "data": signature,
-        }
-    )
+    cert = build_certificate(signature)
 
-    # If we already have signatures, then add the new one to the end of the file
-    if pe.optional_header.certtable_offset:
+    if pe.optional_header.certtable_offset and replace:
+        # Drop the existing signatures. The certificate table is always at the
+        # end of the file
+        certs_offset = pe.optional_header.certtable_offset
+        outfile.truncate(certs_offset)
+        certs_size = len(cert)
+        old_certs_size = 0
+    elif pe.optional_header.certtable_offset:
+        # If we already have signatures, then add the new one to the end of the file
         certs_offset = pe.optional_header.certtable_offset
         certs_size = pe.optional_header.certtable_size + len(cert)
         old_certs_size = pe.optional_header.certtable_size
@@ -1,7 +1,13 @@
 #!/usr/bin/env python
 """Functions for signing PE and MSI files."""
 import logging
+import os
+import shutil
+import tempfile
+import time
 from binascii import hexlify
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 
 import winsign.timestamp
@@ -12,13 +18,26 @@ from winsign.asn1 import (
     der_encode,
     get_signeddata,
     id_signedData,
+    make_authenticode_signeddata,
     resign,
 )
-from winsign.crypto import load_pem_certs, sign_signer_digest
-from winsign.osslsigncode import get_dummy_signature, write_signature
+from winsign.crypto import (
+    load_pem_cert,
+    load_pem_certs_file,
+    sign_signer_digest,
+)
+from winsign.osslsigncode import DUMMY_KEY, get_dummy_signature, write_signature
+from winsign.pefile import add_signature, calc_authenticode_digest, is_pefile
 
 log = logging.getLogger(__name__)
 
+# Recently generated dummy signatures, keyed by the options and Authenticode
+# digest they were generated for. Entries expire, since the signing time
+# recorded in the dummy signature ends up in the real one.
+_DUMMY_SIGNATURES = OrderedDict()
+_DUMMY_SIGNATURES_SIZE = 64
+_DUMMY_SIGNATURES_TTL = 300
+
 
 def key_signer(priv_key):
     """Create a signer function that signs with a private key.
@@ -45,6 +64,83 @@ def key_signer(priv_key):
     return signer
 
 
+@lru_cache(maxsize=1)
+def _load_dummy_cert():
+    """Load the dummy certificate from `DUMMY_KEY`."""
+    return load_pem_cert(DUMMY_KEY.encode())
+
+
+async def _unsigned_signer(digest, digest_algo):
+    """Signer function that doesn't sign anything.
+
+    `resign` replaces the encrypted digest of dummy signatures, so there's no
+    point paying for a private key operation to create one.
+    """
+    return b""
+
+
+async def _get_pe_dummy_signature(
+    authenticode_digest, digest_algo, url=None, comment=None
+):
+    """Create a dummy signature for a PE file, without running osslsigncode.
+
+    The signature has all the Authenticode specific attributes needed by
+    `resign`, but its encrypted digest is left empty.
+
+    Args:
+        authenticode_digest (bytes): Authenticode digest of the PE file to
+                                     generate a dummy signature for
+        digest_algo (str): What digest algorithm to use. Should be one of
+                           'sha1', or 'sha256'
+        url (str): A URL to embed into the signature
+        comment (str): A string to embed into the signature
+
+    Returns:
+        bytes of the dummy signature as a DER encoded ASN.1 structure
+
+    """
+    sig = await make_authenticode_signeddata(
+        _load_dummy_cert(),
+        _unsigned_signer,
+        authenticode_digest,
+        digest_algo,
+        opus_info=comment,
+        opus_url=url,
+    )
+    return der_encode(sig)
+
+
+def _write_pe_signature(infile, outfile, sig):
+    """Writes a signature into a PE file, without running osslsigncode.
+
+    Args:
+        infile (Path): Path to the unsigned file
+        outfile (Path): Path to write the signed file to. May be the same as
+                        infile.
+        sig (bytes): bytes of signature to add into the file
+
+    """
+    # Entries in the certificate table are 8 byte aligned
+    sig = sig.ljust((len(sig) + 7) & ~7, b"\x00")
+    if outfile.resolve() != infile.resolve():
+        with infile.open("rb") as f, outfile.open("wb+") as out:
+            add_signature(f, out, sig, replace=True)
+        return
+
+    # Signing in place; write to a temporary file first so that we're not
+    # truncating the file we're reading from
+    with tempfile.NamedTemporaryFile(dir=outfile.parent, delete=False) as out:
+        try:
+            with infile.open("rb") as f:
+                add_signature(f, out, sig, replace=True)
+            out.close()
+            shutil.copymode(infile, out.name)
+            os.replace(out.name, outfile)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+
+
 async def sign_file(
     infile,
     outfile,
@@ -56,9 +152,13 @@ async def sign_file(
     crosscert=None,
     timestamp_style=None,
     timestamp_url=None,
+    use_osslsigncode=False,
 ):
     """Sign a PE or MSI file.
 
+    PE files are signed in-process. MSI files, or all files if
+    `use_osslsigncode` is set, are signed with the help of osslsigncode.
+
     Args:
         infile (str): Path to the unsigned file
         outfile (str): Path to where the signed file will be written
@@ -74,7 +174,8 @@ async def sign_file(
                                signature. Can be None, 'old', or 'rfc3161'.
         timestamp_url (str): URL for the timestamp server to use. Required if
                              timestamp_style is set.
-
+        use_osslsigncode (bool): Whether to use osslsigncode for PE files as
+                                 well. Defaults to False.
 
     Returns:
         True on success
@@ -84,11 +185,50 @@ async def sign_file(
     infile = Path(infile)
     outfile = Path(outfile)
     try:
-        log.debug("Generating dummy signature")
-        old_sig = get_dummy_signature(
-            infile, digest_algo, url=url, comment=comment, crosscert=crosscert
-        )
-    except OSError:
+        # Parsing the PE headers isn't free, so only do it once per file
+        is_pe = is_pefile(infile)
+        in_process = not use_osslsigncode and is_pe
+
+        # The dummy signature only depends on these options and the file's
+        # Authenticode digest, so files with the same digest can share one
+        cache_key = None
+        if is_pe:
+            with infile.open("rb") as f:
+                authenticode_digest = calc_authenticode_digest(f, digest_algo)
+            cache_key = (
+                in_process,
+                digest_algo,
+                authenticode_digest,
+                url,
+                comment,
+                str(crosscert) if crosscert else None,
+            )
+
+        created, old_sig = _DUMMY_SIGNATURES.get(cache_key, (None, None))
+        if old_sig is not None and time.monotonic() - created < _DUMMY_SIGNATURES_TTL:
+            log.debug("Using cached dummy signature")
+            _DUMMY_SIGNATURES.move_to_end(cache_key)
+        else:
+            log.debug("Generating dummy signature")
+            if in_process:
+                old_sig = await _get_pe_dummy_signature(
+                    authenticode_digest, digest_algo, url=url, comment=comment
+                )
+            else:
+                old_sig = get_dummy_signature(
+                    infile,
+                    digest_algo,
+                    url=url,
+                    comment=comment,
+                    crosscert=crosscert,
+                    is_pe=is_pe,
+                )
+            if cache_key:
+                _DUMMY_SIGNATURES[cache_key] = (time.monotonic(), old_sig)
+                _DUMMY_SIGNATURES.move_to_end(cache_key)
+                if len(_DUMMY_SIGNATURES) > _DUMMY_SIGNATURES_SIZE:
+                    _DUMMY_SIGNATURES.popitem(last=False)
+    except Exception:
         log.error("Couldn't generate dummy signature")
         log.debug("Exception:", exc_info=True)
         return False
@@ -97,8 +237,7 @@ async def sign_file(
         log.debug("Re-signing with real keys")
         old_sig = get_signeddata(old_sig)
         if crosscert:
-            crosscert = Path(crosscert)
-            certs.extend(load_pem_certs(crosscert.read_bytes()))
+            certs = certs + load_pem_certs_file(crosscert)
         newsig = await resign(old_sig, certs, signer)
     except Exception:
         log.error("Couldn't re-sign")
@@ -126,7 +265,10 @@ async def sign_file(
 
     try:
         log.debug("Attaching new signature")
-        write_signature(infile, outfile, newsig)
+        if in_process:
+            _write_pe_signature(infile, outfile, newsig)
+        else:
+            write_signature(infile, outfile, newsig, is_pe=is_pe)
     except Exception:
         log.error("Couldn't write new signature")
         log.debug("Exception:", exc_info=True)
@@ -134,3 +276,31 @@ async def sign_file(
 
     log.debug("Done!")
     return True
+
+
+async def sign_files(files, digest_algo, certs, signer, **kwargs):
+    """Sign several PE or MSI files with the same options.
+
+    Work that doesn't depend on the file being signed, like loading the dummy
+    keys, is only done once for the whole batch.
+
+    Args:
+        files (list): (infile, outfile) pairs of paths to sign
+        digest_algo (str): Which digest algorithm to use. Generally 'sha1' or 'sha256'
+        certs (list of x509 certificates): certificates to attach to the signatures
+        signer (function): Function that takes (digest, digest_algo) and
+                           returns bytes of the signature.
+        **kwargs: Other options, as accepted by `sign_file`
+
+    Returns:
+        A list with True or False for each file, depending on whether it was
+        signed successfully
+
+    """
+    results = []
+    for infile, outfile in files:
+        log.debug("Signing %s to %s", infile, outfile)
+        results.append(
+            await sign_file(infile, outfile, digest_algo, certs, signer, **kwargs)
+        )
+    return results
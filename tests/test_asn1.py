@@ -0,0 +1,66 @@
+"""Tests for winsign.asn1."""
+
+from unittest import mock
+
+import pytest
+from pyasn1.codec.der.encoder import encode as der_encode
+from pyasn1.error import PyAsn1Error
+from pyasn1.type import univ
+from winsign.asn1 import der_decode
+
+ENCODED = der_encode(univ.Integer(5))
+
+
+def test_der_decode_fasder():
+    """Check that pyasn1-fasder's result is used when it succeeds."""
+    spec = univ.Integer()
+    fasder_result = (univ.Integer(7), b"")
+    with mock.patch(
+        "winsign.asn1.fasder_decode", return_value=fasder_result
+    ) as fasder_decode:
+        assert der_decode(ENCODED, spec) is fasder_result
+    assert fasder_decode.call_count == 1
+    args, kwargs = fasder_decode.call_args
+    assert args == (ENCODED,)
+    assert kwargs["asn1Spec"] is spec
+
+
+def test_der_decode_fasder_fallback():
+    """Check that we fall back to pyasn1 when pyasn1-fasder fails."""
+    with mock.patch(
+        "winsign.asn1.fasder_decode", side_effect=PyAsn1Error("not DER")
+    ) as fasder_decode:
+        decoded, rest = der_decode(ENCODED + b"\x00", univ.Integer())
+    assert fasder_decode.call_count == 1
+    assert decoded == 5
+    assert rest == b"\x00"
+
+
+def test_der_decode_no_spec():
+    """Check that pyasn1-fasder isn't used without a schema."""
+    with mock.patch("winsign.asn1.fasder_decode") as fasder_decode:
+        decoded, rest = der_decode(ENCODED)
+    fasder_decode.assert_not_called()
+    assert decoded == 5
+    assert rest == b""
+
+
+def test_der_decode_without_fasder():
+    """Check that we can decode when pyasn1-fasder isn't installed."""
+    with mock.patch("winsign.asn1.fasder_decode", None):
+        decoded, rest = der_decode(ENCODED, univ.Integer())
+    assert decoded == 5
+    assert rest == b""
+
+
+def test_fasder_errors():
+    """Check that pyasn1-fasder's decoding errors are caught by der_decode."""
+    pyasn1_fasder = pytest.importorskip("pyasn1_fasder")
+    with pytest.raises(PyAsn1Error):
+        pyasn1_fasder.decode_der(ENCODED + b"\x00", asn1Spec=univ.Integer())
+    with pytest.raises(PyAsn1Error):
+        pyasn1_fasder.decode_der(ENCODED[:-1], asn1Spec=univ.Integer())
+
+    decoded, rest = der_decode(ENCODED + b"\x00", univ.Integer())
+    assert decoded == 5
+    assert rest == b"\x00"
@@ -0,0 +1,86 @@
+"""Tests for the winsign CLI."""
+import asyncio
+import io
+
+import pytest
+from common import DATA_DIR
+from winsign.cli import _copy_stream, main
+
+
+def test_copy_stream(tmp_path):
+    """Check that we can copy between files, including partially read ones."""
+    src = DATA_DIR / "unsigned.exe"
+    dest = tmp_path / "copy.exe"
+    with src.open("rb") as instream, dest.open("wb") as outstream:
+        outstream.write(instream.read(10))
+        _copy_stream(instream, outstream)
+    assert dest.read_bytes() == src.read_bytes()
+
+
+def test_copy_stream_buffers():
+    """Check that we can copy between in-memory streams."""
+    data = (DATA_DIR / "unsigned.exe").read_bytes()
+    outstream = io.BytesIO()
+    _copy_stream(io.BytesIO(data), outstream)
+    assert outstream.getvalue() == data
+
+
+def test_outdir_duplicate_names(tmp_path, capsys):
+    """Check that files with the same name can't be signed into one --outdir."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    argv = [
+        "--outdir",
+        str(tmp_path / "out"),
+        "--certs",
+        "certs.pem",
+        "--key",
+        "key.pem",
+        "-d",
+        "sha256",
+        str(tmp_path / "a" / "setup.exe"),
+        str(tmp_path / "b" / "setup.exe"),
+    ]
+    with pytest.raises(SystemExit):
+        main(argv, loop=asyncio.new_event_loop())
+    assert "setup.exe" in capsys.readouterr().err
+
+
+def test_outdir_created(tmp_path, signing_keys):
+    """Check that --outdir is created if it doesn't exist."""
+    outdir = tmp_path / "out" / "signed"
+    argv = [
+        "--outdir",
+        str(outdir),
+        "-j",
+        "1",
+        "--certs",
+        str(signing_keys[1]),
+        "--key",
+        str(signing_keys[0]),
+        "-d",
+        "sha256",
+        str(DATA_DIR / "unsigned.exe"),
+    ]
+    assert main(argv, loop=asyncio.new_event_loop()) == 0
+    assert (outdir / "unsigned.exe").is_file()
+
+
+def test_outdir_not_a_directory(tmp_path, capsys):
+    """Check that --outdir must be a directory."""
+    outdir = tmp_path / "out"
+    outdir.write_bytes(b"")
+    argv = [
+        "--outdir",
+        str(outdir),
+        "--certs",
+        "certs.pem",
+        "--key",
+        "key.pem",
+        "-d",
+        "sha256",
+        str(DATA_DIR / "unsigned.exe"),
+    ]
+    with pytest.raises(SystemExit):
+        main(argv, loop=asyncio.new_event_loop())
+    assert "--outdir" in capsys.readouterr().err
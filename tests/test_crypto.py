@@ -0,0 +1,35 @@
+"""Tests for key and certificate loading."""
+import os
+
+import pytest
+from common import DATA_DIR
+from winsign.crypto import load_pem_certs, load_pem_certs_file
+
+
+def test_load_pem_certs():
+    """Check that we load every certificate in a PEM file."""
+    data = (DATA_DIR / "twocerts.pem").read_bytes()
+    assert len(load_pem_certs(data)) == 2
+    assert len(load_pem_certs(b"junk\r\n" + data.replace(b"\n", b"\r\n"))) == 2
+
+
+def test_load_pem_certs_truncated():
+    """Check that a truncated certificate chain is an error."""
+    data = (DATA_DIR / "twocerts.pem").read_bytes()
+    truncated = data[: data.rindex(b"-----END CERTIFICATE-----")]
+    with pytest.raises(ValueError):
+        load_pem_certs(truncated)
+
+
+def test_load_pem_certs_file_cached(tmp_path):
+    """Check that cached certificates are reloaded when the file changes."""
+    certs_file = tmp_path / "certs.pem"
+    certs_file.write_bytes((DATA_DIR / "cert.pem").read_bytes())
+    certs = load_pem_certs_file(certs_file)
+    assert len(certs) == 1
+    assert load_pem_certs_file(certs_file)[0] is certs[0]
+
+    certs_file.write_bytes((DATA_DIR / "twocerts.pem").read_bytes())
+    st = certs_file.stat()
+    os.utime(certs_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert len(load_pem_certs_file(certs_file)) == 2
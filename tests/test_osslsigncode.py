@@ -56,8 +56,11 @@ def osslsigncode_verify(filename, substr=b""):
 
 @pytest.mark.parametrize("test_file", TEST_PE_FILES + TEST_MSI_FILES)
 @pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@pytest.mark.parametrize("use_osslsigncode", [True, False])
 @pytest.mark.asyncio
-async def test_sign_file(test_file, digest_algo, tmp_path, signing_keys):
+async def test_sign_file(
+    test_file, digest_algo, use_osslsigncode, tmp_path, signing_keys
+):
     """Check that we can sign with the osslsign wrapper."""
     signed_exe = tmp_path / "signed.exe"
 
@@ -67,7 +70,14 @@ async def test_sign_file(test_file, digest_algo, tmp_path, signing_keys):
     async def signer(digest, digest_algo):
         return sign_signer_digest(priv_key, digest_algo, digest)
 
-    assert await sign_file(test_file, signed_exe, digest_algo, certs, signer)
+    assert await sign_file(
+        test_file,
+        signed_exe,
+        digest_algo,
+        certs,
+        signer,
+        use_osslsigncode=use_osslsigncode,
+    )
 
     # Check that we have 1 certificate in the signature
     if test_file in TEST_PE_FILES:
@@ -82,8 +92,9 @@ async def test_sign_file(test_file, digest_algo, tmp_path, signing_keys):
             assert verify_pefile(f)
 
 
+@pytest.mark.parametrize("use_osslsigncode", [True, False])
 @pytest.mark.asyncio
-async def test_sign_file_dummy(tmp_path, signing_keys):
+async def test_sign_file_dummy(use_osslsigncode, tmp_path, signing_keys):
     """Check that we can sign with an additional dummy certificate.
 
     The extra dummy certs are used by the stub installer.
@@ -98,7 +109,13 @@ async def test_sign_file_dummy(tmp_path, signing_keys):
         return sign_signer_digest(priv_key, digest_algo, digest)
 
     assert await sign_file(
-        test_file, signed_exe, "sha1", certs, signer, crosscert=signing_keys[1]
+        test_file,
+        signed_exe,
+        "sha1",
+        certs,
+        signer,
+        crosscert=signing_keys[1],
+        use_osslsigncode=use_osslsigncode,
     )
 
     # Check that we have 2 certificates in the signature
@@ -110,8 +127,9 @@ async def test_sign_file_dummy(tmp_path, signing_keys):
         assert len(sigs[0]["certificates"]) == 2
 
 
+@pytest.mark.parametrize("use_osslsigncode", [True, False])
 @pytest.mark.asyncio
-async def test_sign_file_twocerts(tmp_path, signing_keys):
+async def test_sign_file_twocerts(use_osslsigncode, tmp_path, signing_keys):
     """Check that we can include multiple certificates."""
     test_file = DATA_DIR / "unsigned.exe"
     signed_exe = tmp_path / "signed.exe"
@@ -122,7 +140,14 @@ async def test_sign_file_twocerts(tmp_path, signing_keys):
     async def signer(digest, digest_algo):
         return sign_signer_digest(priv_key, digest_algo, digest)
 
-    assert await sign_file(test_file, signed_exe, "sha1", certs, signer)
+    assert await sign_file(
+        test_file,
+        signed_exe,
+        "sha1",
+        certs,
+        signer,
+        use_osslsigncode=use_osslsigncode,
+    )
 
     # Check that we have 2 certificates in the signature
     with signed_exe.open("rb") as f:
@@ -151,9 +176,10 @@ async def test_sign_file_badfile(tmp_path, signing_keys):
 @pytest.mark.asyncio
 @pytest.mark.parametrize("test_file", [DATA_DIR / "unsigned.exe"])
 @pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@pytest.mark.parametrize("use_osslsigncode", [True, False])
 @use_fixed_signing_time
 async def test_timestamp_old(
-    test_file, digest_algo, tmp_path, signing_keys, httpserver
+    test_file, digest_algo, use_osslsigncode, tmp_path, signing_keys, httpserver
 ):
     """Verify that we can sign with old style timestamps."""
     signed_exe = tmp_path / "signed.exe"
@@ -177,6 +203,7 @@ async def test_timestamp_old(
         # Comment this out to use a real timestamp server so that we can
         # capture a response
         timestamp_url=httpserver.url,
+        use_osslsigncode=use_osslsigncode,
     )
 
     # Check that we have 3 certificates in the signature
@@ -193,10 +220,11 @@ async def test_timestamp_old(
 
 @pytest.mark.parametrize("test_file", [DATA_DIR / "unsigned.exe"])
 @pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@pytest.mark.parametrize("use_osslsigncode", [True, False])
 @use_fixed_signing_time
 @pytest.mark.asyncio
 async def test_timestamp_rfc3161(
-    test_file, digest_algo, tmp_path, signing_keys, httpserver
+    test_file, digest_algo, use_osslsigncode, tmp_path, signing_keys, httpserver
 ):
     """Verify that we can sign with RFC3161 timestamps."""
     signed_exe = tmp_path / "signed.exe"
@@ -220,6 +248,7 @@ async def test_timestamp_rfc3161(
         # Comment this out to use a real timestamp server so that we can
         # capture a response
         timestamp_url=httpserver.url,
+        use_osslsigncode=use_osslsigncode,
     )
 
     # Check that we have 1 certificate in the signature,
@@ -259,3 +288,11 @@ def test_is_signed(test_file, file_is_signed, caplog):
 
     if not file_is_signed:
         assert "osslsigncode failed" not in caplog.text
+
+
+def test_is_signed_keepalive(monkeypatch):
+    """Test that osslsigncode commands can be run via the keepalive server."""
+    monkeypatch.setenv("WINSIGN_KEEPALIVE", "1")
+    assert is_signed(DATA_DIR / "signed.exe")
+    assert not is_signed(DATA_DIR / "unsigned.exe")
+    assert is_signed(DATA_DIR / "signed.exe")
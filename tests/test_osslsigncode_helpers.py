@@ -0,0 +1,38 @@
+"""Tests for osslsigncode helpers that don't need osslsigncode installed."""
+import logging
+import subprocess
+from unittest import mock
+
+import pytest
+from winsign import osslsigncode
+
+
+def test_tmp_root_shm(tmp_path, monkeypatch):
+    """Check that a writable /dev/shm is used when TMPDIR isn't set."""
+    monkeypatch.delenv("TMPDIR", raising=False)
+    monkeypatch.setattr(osslsigncode, "_SHM_DIR", str(tmp_path))
+    assert osslsigncode._tmp_root() == str(tmp_path)
+
+
+def test_tmp_root_tmpdir(tmp_path, monkeypatch):
+    """Check that TMPDIR is respected."""
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    monkeypatch.setattr(osslsigncode, "_SHM_DIR", str(tmp_path))
+    assert osslsigncode._tmp_root() is None
+
+
+def test_tmp_root_unusable(tmp_path, monkeypatch):
+    """Check that we fall back to the default if /dev/shm isn't writable."""
+    monkeypatch.delenv("TMPDIR", raising=False)
+    monkeypatch.setattr(osslsigncode, "_SHM_DIR", str(tmp_path / "missing"))
+    assert osslsigncode._tmp_root() is None
+
+
+def test_osslsigncode_error_logging_disabled(caplog):
+    """Check that failures are reported when error logging is turned off."""
+    caplog.set_level(logging.CRITICAL, logger="winsign.osslsigncode")
+    result = subprocess.CompletedProcess(["osslsigncode"], 1, stdout=None)
+    with mock.patch("subprocess.run", return_value=result) as run:
+        with pytest.raises(OSError):
+            osslsigncode.osslsigncode(["verify", "missing.exe"])
+    assert run.call_args[1]["stdout"] is subprocess.DEVNULL
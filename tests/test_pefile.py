@@ -3,7 +3,7 @@
 import pytest
 from common import TEST_PE_FILES
 from winsign.crypto import load_pem_certs, load_private_key, sign_signer_digest
-from winsign.pefile import sign_file
+from winsign.pefile import build_certificate, certificate, sign_file
 from winsign.verify import verify_pefile
 
 
@@ -26,3 +26,16 @@ async def test_sign(test_file, digest_algo, tmp_path, signing_keys):
         assert await sign_file(infile, outfile, digest_algo, cert, signer)
 
         assert verify_pefile(outfile)
+
+
+@pytest.mark.parametrize("data", [b"", b"\x30\x82" + b"\x00" * 14, b"\xff" * 1000])
+def test_build_certificate(data):
+    """Check that build_certificate matches the construct definition."""
+    cert = build_certificate(data)
+    assert cert == certificate.build(
+        {"size": len(data) + 8, "revision": "REV2", "certtype": "PKCS7", "data": data}
+    )
+    parsed = certificate.parse(cert)
+    assert parsed.revision == "REV2"
+    assert parsed.certtype == "PKCS7"
+    assert parsed.data == data
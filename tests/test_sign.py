@@ -1,5 +1,23 @@
 """Tests specific to signing functionality."""
-from common import DATA_DIR
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+import winsign.sign
+from pyasn1.type.useful import UTCTime
+from common import DATA_DIR, TEST_PE_FILES, use_fixed_signing_time
+from winsign.asn1 import (
+    SpcSpOpusInfo,
+    der_decode,
+    get_signatures_from_certificates,
+    id_signingTime,
+    id_spcSpOpusInfo,
+    id_timestampSignature,
+)
+from winsign.crypto import load_pem_certs, load_private_key
+from winsign.pefile import get_certificates
+from winsign.sign import key_signer, sign_file, sign_files
 from winsign.verify import verify_pefile
 
 
@@ -7,3 +25,288 @@ def test_verify_signed_file():
     """Test that our internal verification code works."""
     with (DATA_DIR / "signed.exe").open("rb") as f:
         assert verify_pefile(f)
+
+
+@pytest.mark.parametrize("test_file", TEST_PE_FILES)
+@pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@pytest.mark.asyncio
+async def test_sign_file_in_process(test_file, digest_algo, tmp_path, signing_keys):
+    """Check that we can sign PE files without osslsigncode."""
+    signed_exe = tmp_path / "signed.exe"
+
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+
+    assert await sign_file(
+        test_file,
+        signed_exe,
+        digest_algo,
+        certs,
+        key_signer(priv_key),
+        url="https://example.com",
+        comment="winsign test",
+        crosscert=signing_keys[1],
+    )
+
+    with signed_exe.open("rb") as f:
+        certificates = get_certificates(f)
+        sigs = get_signatures_from_certificates(certificates)
+        assert len(certificates) == 1
+        assert len(sigs) == 1
+        assert len(sigs[0]["certificates"]) == 2
+
+        assert verify_pefile(f)
+
+    opus_attrs = [
+        attr
+        for attr in sigs[0]["signerInfos"][0]["authenticatedAttributes"]
+        if attr["type"] == id_spcSpOpusInfo
+    ]
+    assert len(opus_attrs) == 1
+    opus, _ = der_decode(opus_attrs[0]["values"][0], SpcSpOpusInfo())
+    assert str(opus["programName"]["ascii"]) == "winsign test"
+    assert str(opus["moreInfo"]["url"]) == "https://example.com"
+
+
+@pytest.mark.parametrize(
+    "certs_file, crosscert, num_certs",
+    [
+        ("cert.pem", "cert.pem", 2),
+        ("twocerts.pem", None, 2),
+        ("twocerts.pem", "cert.pem", 3),
+    ],
+)
+@pytest.mark.asyncio
+async def test_sign_file_in_process_certs(
+    certs_file, crosscert, num_certs, tmp_path, signing_keys
+):
+    """Check that extra and cross certificates are included in the signature."""
+    signed_exe = tmp_path / "signed.exe"
+
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs((DATA_DIR / certs_file).read_bytes())
+
+    assert await sign_file(
+        DATA_DIR / "unsigned.exe",
+        signed_exe,
+        "sha1",
+        certs,
+        key_signer(priv_key),
+        crosscert=DATA_DIR / crosscert if crosscert else None,
+    )
+
+    with signed_exe.open("rb") as f:
+        certificates = get_certificates(f)
+        sigs = get_signatures_from_certificates(certificates)
+        assert len(certificates) == 1
+        assert len(sigs) == 1
+        assert len(sigs[0]["certificates"]) == num_certs
+
+        assert verify_pefile(f)
+
+
+@pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@use_fixed_signing_time
+@pytest.mark.asyncio
+async def test_timestamp_old_in_process(
+    digest_algo, tmp_path, signing_keys, httpserver
+):
+    """Check that we can add old style timestamps without osslsigncode."""
+    signed_exe = tmp_path / "signed.exe"
+
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+
+    httpserver.serve_content(
+        (DATA_DIR / f"unsigned-{digest_algo}-ts-old.dat").read_bytes()
+    )
+    assert await sign_file(
+        DATA_DIR / "unsigned.exe",
+        signed_exe,
+        digest_algo,
+        certs,
+        key_signer(priv_key),
+        timestamp_style="old",
+        timestamp_url=httpserver.url,
+    )
+
+    # The timestamp adds the timestamp server's 2 certificates
+    with signed_exe.open("rb") as f:
+        certificates = get_certificates(f)
+        sigs = get_signatures_from_certificates(certificates)
+        assert len(certificates) == 1
+        assert len(sigs) == 1
+        assert len(sigs[0]["certificates"]) == 3
+
+        assert verify_pefile(f)
+
+
+@pytest.mark.parametrize("digest_algo", ["sha1", "sha256"])
+@use_fixed_signing_time
+@pytest.mark.asyncio
+async def test_timestamp_rfc3161_in_process(
+    digest_algo, tmp_path, signing_keys, httpserver
+):
+    """Check that we can add RFC3161 timestamps without osslsigncode."""
+    signed_exe = tmp_path / "signed.exe"
+
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+
+    httpserver.serve_content(
+        (DATA_DIR / f"unsigned-{digest_algo}-ts-rfc3161.dat").read_bytes()
+    )
+    assert await sign_file(
+        DATA_DIR / "unsigned.exe",
+        signed_exe,
+        digest_algo,
+        certs,
+        key_signer(priv_key),
+        timestamp_style="rfc3161",
+        timestamp_url=httpserver.url,
+    )
+
+    with signed_exe.open("rb") as f:
+        certificates = get_certificates(f)
+        sigs = get_signatures_from_certificates(certificates)
+        assert len(certificates) == 1
+        assert len(sigs) == 1
+        assert len(sigs[0]["certificates"]) == 1
+        unauthenticated = sigs[0]["signerInfos"][0]["unauthenticatedAttributes"]
+        assert any(attr["type"] == id_timestampSignature for attr in unauthenticated)
+
+        assert verify_pefile(f)
+
+
+@pytest.mark.asyncio
+async def test_sign_file_in_place(tmp_path, signing_keys):
+    """Check that we can sign PE files in place without osslsigncode."""
+    test_file = tmp_path / "unsigned.exe"
+    test_file.write_bytes((DATA_DIR / "unsigned.exe").read_bytes())
+
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+
+    assert await sign_file(test_file, test_file, "sha256", certs, key_signer(priv_key))
+
+    with test_file.open("rb") as f:
+        assert verify_pefile(f)
+    assert [p.name for p in tmp_path.iterdir()] == ["unsigned.exe"]
+
+
+@pytest.mark.asyncio
+async def test_sign_files(tmp_path, signing_keys):
+    """Check that we can sign a batch of files."""
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+    files = [(f, tmp_path / f.name) for f in TEST_PE_FILES]
+
+    results = await sign_files(
+        files, "sha256", certs, key_signer(priv_key), crosscert=signing_keys[1]
+    )
+    assert results == [True] * len(files)
+    # The crosscert shouldn't accumulate in the certs we passed in
+    assert len(certs) == 1
+
+    for _, signed_exe in files:
+        with signed_exe.open("rb") as f:
+            sigs = get_signatures_from_certificates(get_certificates(f))
+            assert len(sigs[0]["certificates"]) == 2
+            assert verify_pefile(f)
+
+
+@pytest.mark.asyncio
+async def test_sign_file_cached_dummy(tmp_path, signing_keys):
+    """Check that dummy signatures are reused for identical files."""
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+    test_file = DATA_DIR / "unsigned64.exe"
+    copy = tmp_path / "copy.exe"
+    copy.write_bytes(test_file.read_bytes())
+    winsign.sign._DUMMY_SIGNATURES.clear()
+
+    with mock.patch(
+        "winsign.sign._get_pe_dummy_signature",
+        wraps=winsign.sign._get_pe_dummy_signature,
+    ) as m:
+        for i, infile in enumerate([test_file, copy, test_file]):
+            signed_exe = tmp_path / f"signed{i}.exe"
+            assert await sign_file(
+                infile, signed_exe, "sha1", certs, key_signer(priv_key)
+            )
+            with signed_exe.open("rb") as f:
+                assert verify_pefile(f)
+        assert m.call_count == 1
+
+        assert await sign_file(
+            test_file, signed_exe, "sha256", certs, key_signer(priv_key)
+        )
+        assert m.call_count == 2
+
+        with mock.patch("winsign.sign._DUMMY_SIGNATURES_TTL", 0):
+            assert await sign_file(
+                test_file, signed_exe, "sha256", certs, key_signer(priv_key)
+            )
+        assert m.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_sign_file_single_rsa_operation(tmp_path, signing_keys):
+    """Check that in-process signing only uses the private key once."""
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+    signed_exe = tmp_path / "signed.exe"
+    winsign.sign._DUMMY_SIGNATURES.clear()
+
+    with mock.patch(
+        "winsign.sign.sign_signer_digest", wraps=winsign.sign.sign_signer_digest
+    ) as m:
+        assert await sign_file(
+            DATA_DIR / "unsigned.exe", signed_exe, "sha256", certs, key_signer(priv_key)
+        )
+    assert m.call_count == 1
+    with signed_exe.open("rb") as f:
+        assert verify_pefile(f)
+
+
+@pytest.mark.asyncio
+async def test_sign_file_signing_time(tmp_path, signing_keys, monkeypatch):
+    """Check that the signing time is in UTC, whatever the local timezone."""
+    monkeypatch.setenv("TZ", "America/Los_Angeles")
+    time.tzset()
+    try:
+        priv_key = load_private_key(open(signing_keys[0], "rb").read())
+        certs = load_pem_certs(signing_keys[1].read_bytes())
+        signed_exe = tmp_path / "signed.exe"
+        winsign.sign._DUMMY_SIGNATURES.clear()
+        assert await sign_file(
+            DATA_DIR / "unsigned.exe", signed_exe, "sha256", certs, key_signer(priv_key)
+        )
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    with signed_exe.open("rb") as f:
+        sigs = get_signatures_from_certificates(get_certificates(f))
+    (signing_time,) = [
+        attr["values"][0]
+        for attr in sigs[0]["signerInfos"][0]["authenticatedAttributes"]
+        if attr["type"] == id_signingTime
+    ]
+    signing_time, _ = der_decode(signing_time, UTCTime())
+    delta = datetime.now(timezone.utc) - signing_time.asDateTime
+    assert abs(delta) < timedelta(minutes=5)
+
+
+@pytest.mark.asyncio
+async def test_sign_files_missing(tmp_path, signing_keys):
+    """Check that a missing file fails without stopping the rest of a batch."""
+    priv_key = load_private_key(open(signing_keys[0], "rb").read())
+    certs = load_pem_certs(signing_keys[1].read_bytes())
+    files = [
+        (tmp_path / "missing.exe", tmp_path / "signed-missing.exe"),
+        (DATA_DIR / "unsigned.exe", tmp_path / "signed.exe"),
+    ]
+
+    results = await sign_files(files, "sha256", certs, key_signer(priv_key))
+    assert results == [False, True]